@@ -3,7 +3,11 @@
 import serial
 import serial.tools.list_ports
 import logging
+from logging.handlers import MemoryHandler
+import atexit
 import json
+import os
+import select
 import socket
 import asyncio
 from pathlib import Path
@@ -14,6 +18,8 @@ import re
 import threading
 import time
 import queue
+import zlib
+from collections import deque
 
 try:
     import websockets
@@ -23,7 +29,104 @@ try:
 except ImportError:
     HAS_WEBSOCKETS = False
 
+try:
+    import orjson
+    HAS_ORJSON = True
+except ImportError:
+    HAS_ORJSON = False
+
+
+def _json_default(obj):
+    """Serialize the sets/frozensets used for sentence selections as JSON arrays."""
+    if isinstance(obj, (set, frozenset)):
+        return sorted(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def _json_dumpb(obj):
+    """Compact JSON as UTF-8 bytes, for hand-built response bodies. Uses orjson's C encoder
+    when installed (its output is already bytes), the stdlib encoder otherwise."""
+    if HAS_ORJSON:
+        return orjson.dumps(obj, default=_json_default, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(obj, separators=(',', ':'), default=_json_default).encode('utf-8')
+
+
+def _json_dumps(obj):
+    """Compact JSON text (str), for SSE payloads formatted into event frames."""
+    if HAS_ORJSON:
+        return orjson.dumps(obj, default=_json_default, option=orjson.OPT_NON_STR_KEYS).decode('utf-8')
+    return json.dumps(obj, separators=(',', ':'), default=_json_default)
+
+class _BatchingMemoryHandler(MemoryHandler):
+    """MemoryHandler whose flush() hands every buffered record to the target FileHandler as
+    one write() and one flush(). The stock flush() calls target.handle() per record, and each
+    emit() writes and flushes on its own."""
+
+    def handle_batch(self, records):
+        """Buffer several records at once and write them out together."""
+        self.acquire()
+        try:
+            self.buffer.extend(r for r in records if self.filter(r))
+            self.flush()
+        finally:
+            self.release()
+
+    def flush(self):
+        self.acquire()
+        try:
+            target = self.target
+            if not self.buffer or target is None:
+                return
+            records = [r for r in self.buffer if r.levelno >= target.level and target.filter(r)]
+            self.buffer = []
+            if not records:
+                return
+            first = records[0]
+            target.acquire()
+            try:
+                if target.stream is None:
+                    # File closed (log deleted): emit() reopens it with the first record
+                    target.handle(records.pop(0))
+                if records:
+                    target.stream.write(''.join(target.format(r) + target.terminator for r in records))
+                    target.flush()
+            except Exception:
+                target.handleError(first)
+            finally:
+                target.release()
+        finally:
+            self.release()
+
+
+# Autopilot UDP destination (ArduPilot NMEA input on the host); override with
+# NMEA_STREAM_TARGET=host:port
+DEFAULT_STREAM_HOST = 'host.docker.internal'
+DEFAULT_STREAM_PORT = 27000
+
+
+def _parse_stream_target(value):
+    """Split a host:port NMEA_STREAM_TARGET value. A missing host, or a missing, non-numeric or
+    out-of-range port, logs a warning and falls back to the default target."""
+    if not value:
+        return DEFAULT_STREAM_HOST, DEFAULT_STREAM_PORT
+    host, _, port = value.strip().rpartition(':')
+    if host and port.isdigit() and 0 < int(port) < 65536:
+        return host, int(port)
+    logging.getLogger('app').warning(
+        f"Invalid NMEA_STREAM_TARGET {value!r} (expected host:port); "
+        f"using {DEFAULT_STREAM_HOST}:{DEFAULT_STREAM_PORT}")
+    return DEFAULT_STREAM_HOST, DEFAULT_STREAM_PORT
+
+
+STREAM_HOST, STREAM_PORT = _parse_stream_target(os.environ.get('NMEA_STREAM_TARGET'))
+STREAM_TARGET = f"{STREAM_HOST}:{STREAM_PORT}"
+
 app = Flask(__name__, static_folder='static')
+# jsonify: compact output and no per-response key sort (Flask 2.0 config keys)
+app.config['JSONIFY_PRETTYPRINT_REGULAR'] = False
+app.config['JSON_SORT_KEYS'] = False
+# Largest request body any route accepts (/api/log/batch); bigger uploads get 413
+app.config['MAX_CONTENT_LENGTH'] = 1 << 20
 CORS(app)
 
 class NMEAHandler:
@@ -52,14 +155,16 @@ class NMEAHandler:
     }
     
     # Sentences auto-enabled on connection for dashboard display
-    REQUIRED_SENTENCES = ['MWVR', 'MWVT', 'MWD', 'HDT', 'VTG', 'ROT', 'ZDA']
+    REQUIRED_SENTENCES = ('MWVR', 'MWVT', 'MWD', 'HDT', 'VTG', 'ROT', 'ZDA')
 
     # Sentence codes forwarded to the autopilot via UDP, keyed by mode.
     AUTOPILOT_MODES = {
-        'windvane': {'MWV'},                      # ArduRover NMEA wind vane
-        'gps':      {'GGA', 'RMC', 'VTG', 'HDT'}, # External GPS + heading source
+        'windvane': frozenset({'MWV'}),                      # ArduRover NMEA wind vane
+        'gps':      frozenset({'GGA', 'RMC', 'VTG', 'HDT'}), # External GPS + heading source
     }
     DEFAULT_AUTOPILOT_MODE = 'windvane'
+    # Sorted sentence codes per mode, for responses and log lines (the sets never change)
+    AUTOPILOT_MODE_SENTENCES = {mode: tuple(sorted(codes)) for mode, codes in AUTOPILOT_MODES.items()}
 
     # After probe at 4800, switch to this rate (300WX supports up to 115200 via $PAMTC,BAUD).
     OPERATING_BAUD_RATE = 115200
@@ -80,6 +185,37 @@ class NMEAHandler:
     CONN_STATUS_CONNECTED = 'connected'
     CONN_STATUS_FAILED = 'failed'
 
+    # Seconds between UDP throughput summaries in the app log (hot path logs errors only)
+    STREAM_STATS_LOG_INTERVAL = 60.0
+
+    # Driver receive buffer requested where pyserial supports it (Windows)
+    SERIAL_RX_BUFFER_SIZE = 65536
+
+    # Drop the reader's line buffer if this many bytes arrive without a newline (wrong baud / noise)
+    RX_BUF_MAX = 4096
+
+    # Reader-thread backoff (seconds) after unexpected read errors; doubles per failure
+    READ_ERROR_BACKOFF_MIN = 0.1
+    READ_ERROR_BACKOFF_MAX = 2.0
+
+    # Max seconds NMEA log lines may sit in the in-memory buffer before being written
+    NMEA_LOG_FLUSH_INTERVAL = 1.0
+
+    # Upper bound on memoized address -> message type entries (garbage addresses must not grow it)
+    MSG_TYPE_CACHE_MAX = 256
+
+    # Autopilot UDP destination (validated NMEA_STREAM_TARGET or the default)
+    UDP_TARGET_HOST = STREAM_HOST
+    UDP_TARGET_PORT = STREAM_PORT
+
+    # Kernel send buffer for the autopilot UDP socket (absorbs bursts; sends never block).
+    # Linux clamps this to net.core.wmem_max; the effective size is logged on open.
+    UDP_SNDBUF_BYTES = 1 << 20
+
+    # Autopilot UDP batching: flush early at this many sentences / bytes (stays under a 1500 MTU)
+    UDP_BATCH_MAX_SENTENCES = 16
+    UDP_BATCH_MAX_BYTES = 1200
+
     @staticmethod
     def _line_looks_like_nmea(line):
         """Heuristic shape check before checksum (probe / fast filter)."""
@@ -87,6 +223,20 @@ class NMEAHandler:
             return False
         return line.startswith('$') or line.startswith('!')
 
+    @staticmethod
+    def _wait_serial_readable(conn, timeout):
+        """Block until the serial port has input or timeout elapses; True if a read will not stall.
+        POSIX uses select() on the fd; Windows COM handles are not selectable, so poll in_waiting."""
+        if os.name == 'posix':
+            readable, _, _ = select.select([conn.fileno()], [], [], timeout)
+            return bool(readable)
+        deadline = time.time() + timeout
+        while not conn.in_waiting:
+            if time.time() >= deadline:
+                return False
+            time.sleep(0.01)
+        return True
+
     @staticmethod
     def _nmea_cmd(payload: str) -> bytes:
         """Build $payload*hh\\r\\n — XOR checksum over payload (between $ and *), per NMEA 0183."""
@@ -95,6 +245,13 @@ class NMEAHandler:
             csum ^= ord(ch)
         return f'${payload}*{csum:02X}\r\n'.encode('ascii')
 
+    # Fixed device commands, checksummed and encoded once at class load
+    _CMD_TX_ON = _nmea_cmd.__func__('PAMTX,1')
+    _CMD_TX_OFF = _nmea_cmd.__func__('PAMTX,0')
+    _CMD_BAUD_OPERATING = _nmea_cmd.__func__(f'PAMTC,BAUD,{OPERATING_BAUD_RATE}')
+    _CMD_BAUD_OPERATING_CFG = _nmea_cmd.__func__(f'PAMTC,BAUD,{OPERATING_BAUD_RATE},CFG')
+    _CMD_ENABLE_REQUIRED = None  # all REQUIRED_SENTENCES enables in one buffer; set after the class
+
     @classmethod
     def _nmea_sentence_formatter(cls, addr: str) -> str:
         """
@@ -115,15 +272,27 @@ class NMEAHandler:
         self.app_logger = logging.getLogger('app')
         
         self.nmea_messages = set()
+        self._msg_type_cache = {}  # { raw address bytes: msg_type }, see _msg_type_for_address
+        self._ports_cache = (float('-inf'), [])  # (time.monotonic() of scan, ports), see get_ports
+        self._last_iso = (None, '')  # (time.time_ns() stamp, ISO string), see _iso_timestamp
         self.log_path = None
         self.state_path = None
         self.udp_socket = None
+        self._udp_connected = False  # udp_socket is connect()ed to the resolved UDP target
         self.is_streaming = False
         self.streamed_messages = 0
+        self.dropped_messages = 0  # UDP sends dropped because the socket buffer was full
+        self._udp_batch = bytearray()  # Sentences queued for the next autopilot datagram
+        self._udp_batch_count = 0
+        # Sentence codes forwarded for the current autopilot mode (see set_autopilot_mode)
+        self._udp_sentences = self.AUTOPILOT_MODES[self.DEFAULT_AUTOPILOT_MODE]
         self.messages_received = 0  # Total NMEA messages received since connection
         self.connected_since = None  # epoch seconds when connection established
-        self.message_history = []  # Store recent message history
         self.max_history = 100  # Maximum number of messages to keep in history
+        self.message_history = deque(maxlen=self.max_history)  # Recent messages, newest first
+        self._history_version = 0  # Bumped on every history change; keys the /api/read cache
+        self._history_list_cache = (None, [])  # (history_version, formatted messages)
+        self._history_json_cache = (None, b'[]')  # (history_version, serialized messages array)
         # Last-seen timestamps for configured sentence IDs (used for UI sync)
         # { sentence_id: epoch_seconds_last_seen }
         self.sentence_last_seen = {}
@@ -149,6 +318,10 @@ class NMEAHandler:
         self._sse_clients = set()  # set[queue.Queue]
         self._last_sensor_emit_ts = 0.0
         self._last_status_emit_ts = 0.0
+
+        # UDP throughput summary (logged periodically instead of per sentence)
+        self._stream_count_bucket = 0
+        self._last_stream_stats_log_ts = time.time()
         
         # Connection status tracking
         self.connection_status = self.CONN_STATUS_DISCONNECTED
@@ -173,6 +346,9 @@ class NMEAHandler:
             'autopilot_mode': self.DEFAULT_AUTOPILOT_MODE,
             'sentence_config': {}  # { sentence_id: { "enabled": bool, "interval": int (tenths) } }
         }
+        self._saved_state_json = None  # Last serialized state written to state_path
+        self._state_version = 0  # Bumped on every save_state(); keys the /api/stream/status cache
+        self._status_prefix_cache = (None, b'')  # (state_version, serialized static status fields)
         # Lock so only one consumer reads from serial (reader thread vs sentence query)
         self._serial_lock = threading.Lock()
         # Throttle "no data" serial read errors (log at most once per 30s)
@@ -259,7 +435,9 @@ class NMEAHandler:
         
         # Thread control
         self.reader_thread = None
-        self.should_stop = False
+        self._stop_evt = threading.Event()  # Set to stop the reader; its waits wake immediately
+        self._rx_buf = bytearray()  # Partial serial line carried between reads
+        self._err_backoff = self.READ_ERROR_BACKOFF_MIN  # Reader sleep after an unexpected error
         
         # Configure logging
         log_dir = Path('/app/logs')
@@ -271,7 +449,14 @@ class NMEAHandler:
         nmea_fh.setLevel(logging.INFO)
         nmea_formatter = logging.Formatter('%(asctime)s - %(message)s')
         nmea_fh.setFormatter(nmea_formatter)
-        self.nmea_logger.addHandler(nmea_fh)
+        self._nmea_fh = nmea_fh
+        # Buffer sentences in RAM and write each batch with a single write(); the reader thread
+        # flushes at least every NMEA_LOG_FLUSH_INTERVAL, with or without new data.
+        self._nmea_log_buffer = _BatchingMemoryHandler(capacity=64, flushLevel=logging.ERROR,
+                                                       target=nmea_fh, flushOnClose=True)
+        self.nmea_logger.addHandler(self._nmea_log_buffer)
+        atexit.register(self._nmea_log_buffer.flush)
+        self._last_nmea_log_flush_ts = time.time()
         self.nmea_logger.setLevel(logging.INFO)
         # Per-line NMEA must not propagate to the root logger (avoids flooding
         # BlueOS extension / container logs at INFO for every sentence).
@@ -301,7 +486,8 @@ class NMEAHandler:
         try:
             if self.state_path.exists():
                 with open(self.state_path, 'r') as f:
-                    loaded = json.load(f)
+                    self._saved_state_json = f.read()
+                loaded = json.loads(self._saved_state_json)
                 self.state.update(loaded)
                 # Older installs saved 38400; 300WX manual supports 115200 as max practical NMEA rate here.
                 if self.state.get('baud_rate') == 38400:
@@ -313,6 +499,7 @@ class NMEAHandler:
                     self.state['sentence_config'] = {}
                 if self.state.get('autopilot_mode') not in self.AUTOPILOT_MODES:
                     self.state['autopilot_mode'] = self.DEFAULT_AUTOPILOT_MODE
+                self._udp_sentences = self.AUTOPILOT_MODES[self.state['autopilot_mode']]
                 self.is_streaming = self.state.get('is_streaming', False)
                 self.app_logger.debug(f"Loaded state: port={self.state['port']}, baud={self.state['baud_rate']}, streaming={self.is_streaming}")
         except Exception as e:
@@ -320,12 +507,22 @@ class NMEAHandler:
 
     def save_state(self):
         """Save current state to file"""
+        # Streaming, port, baud and autopilot-mode changes all save state
+        self._state_version += 1
         try:
             self.state['is_streaming'] = self.is_streaming
             if 'sentence_config' not in self.state:
                 self.state['sentence_config'] = {}
-            with open(self.state_path, 'w') as f:
-                json.dump(self.state, f)
+            state_json = json.dumps(self.state, separators=(',', ':'))
+            if state_json == self._saved_state_json:
+                return  # Nothing changed since the last write
+            # Write a sibling temp file and rename over state.json so a crash mid-write
+            # never leaves a truncated state file behind
+            tmp_path = self.state_path.with_suffix('.json.tmp')
+            with open(tmp_path, 'w') as f:
+                f.write(state_json)
+            os.replace(tmp_path, self.state_path)
+            self._saved_state_json = state_json
             self.app_logger.debug(f"Saved state: port={self.state['port']}, baud={self.state['baud_rate']}")
         except Exception as e:
             self.app_logger.error(f"Error saving state: {e}")
@@ -397,7 +594,10 @@ class NMEAHandler:
     def start_reader_thread(self):
         """Start the background thread for reading serial data"""
         if self.reader_thread is None or not self.reader_thread.is_alive():
-            self.should_stop = False
+            self._stop_evt.clear()
+            self._rx_buf = bytearray()
+            self._err_backoff = self.READ_ERROR_BACKOFF_MIN
+            self._clear_stream_batch()
             self.reader_thread = threading.Thread(target=self._read_serial_loop)
             self.reader_thread.daemon = True
             self.reader_thread.start()
@@ -405,27 +605,64 @@ class NMEAHandler:
 
     def stop_reader_thread(self):
         """Stop the background thread"""
-        self.should_stop = True
+        self._stop_evt.set()
         if self.reader_thread and self.reader_thread.is_alive():
             self.reader_thread.join(timeout=1.0)
-            self.app_logger.debug("Stopped serial reader thread")
+            if self.reader_thread.is_alive():
+                self.app_logger.warning("Serial reader thread did not exit within 1s")
+            else:
+                self.app_logger.debug("Stopped serial reader thread")
+
+    def _take_complete_lines(self, buf):
+        """Remove and return everything up to the last newline in buf (b'' if no full line yet).
+        A buffer that grows past RX_BUF_MAX without a newline (wrong baud / noise) is discarded."""
+        end = buf.rfind(b'\n')
+        if end < 0:
+            if len(buf) > self.RX_BUF_MAX:
+                buf.clear()
+            return b''
+        lines = bytes(buf[:end + 1])
+        del buf[:end + 1]
+        return lines
 
     def _split_nmea_sentences(self, data):
-        """Split a read buffer into individual NMEA sentences (one per yield).
+        """Split a read buffer (bytes) into individual NMEA sentences (one per yield).
         Handles $... and !... (AIS etc.), multiple sentences per read, and CR/LF."""
-        if not data or ('$' not in data and '!' not in data):
+        if not data or (b'$' not in data and b'!' not in data):
             return
-        for line in re.split(r'[\r\n]+', data):
+        for line in data.splitlines():
             line = line.strip()
             if not line:
                 continue
-            starts = [m.start() for m in re.finditer(r'[$!]', line)]
+            # Common case: one sentence per line, no regex scan needed
+            if line.find(b'$', 1) < 0 and line.find(b'!', 1) < 0:
+                if line[:1] in (b'$', b'!') and b',' in line:
+                    yield line
+                continue
+            starts = [m.start() for m in re.finditer(rb'[$!]', line)]
             for i, start in enumerate(starts):
                 end = starts[i + 1] if i + 1 < len(starts) else len(line)
                 frag = line[start:end].strip()
-                if frag and ',' in frag:
+                if frag and b',' in frag:
                     yield frag
 
+    def _msg_type_for_address(self, address_field):
+        """Resolve the raw first NMEA field (bytes, e.g. b'$WIMWV') to its message type. The device
+        emits a handful of distinct addresses, so results are memoized instead of re-running the
+        decode, regex and formatter for every sentence."""
+        msg_type = self._msg_type_cache.get(address_field)
+        if msg_type is None:
+            # Letters only; avoids HCHDG31.0 from truncated lines
+            raw_type = address_field.decode('ascii', errors='ignore').lstrip('$!').strip()
+            m = re.match(r'^[A-Z]+', raw_type) if raw_type else None
+            addr = m.group(0) if m else (raw_type or '')
+            msg_type = self._nmea_sentence_formatter(addr)
+            if len(self._msg_type_cache) >= self.MSG_TYPE_CACHE_MAX:
+                self._msg_type_cache.clear()
+            self._msg_type_cache[address_field] = msg_type
+            self.nmea_messages.add(msg_type)
+        return msg_type
+
     def _map_msg_to_sentence_id(self, raw_line, msg_type):
         """Map an incoming NMEA msg to a device sentence_id (SUPPORTED_SENTENCES key).
         Returns None if no reliable mapping exists."""
@@ -450,6 +687,34 @@ class NMEAHandler:
         except Exception:
             return None
 
+    @staticmethod
+    def _xor_checksum(body):
+        """XOR of all bytes in body. The bytes are loaded into one int and folded in halves, so
+        a sentence takes ~log2(len) big-int operations in C instead of a Python loop per byte."""
+        n = len(body)
+        x = int.from_bytes(body, 'big')
+        while n > 1:
+            half = (n + 1) // 2
+            shift = half * 8
+            x = (x >> shift) ^ (x & ((1 << shift) - 1))
+            n = half
+        return x
+
+    def _nmea_checksum_ok_bytes(self, sentence):
+        """Checksum check on a raw sentence (bytes starting with $ or !, as yielded by
+        _split_nmea_sentences). Same results as _nmea_checksum_ok, without decoding first."""
+        star = sentence.find(b'*')
+        if star < 0:
+            return None
+        chk = sentence[star + 1:].strip()
+        if len(chk) < 2:
+            return None
+        try:
+            expected = int(chk[:2], 16)
+        except ValueError:
+            return None
+        return self._xor_checksum(sentence[1:star]) == expected
+
     def _nmea_checksum_ok(self, raw_line):
         """Return True if checksum matches, False if mismatch, None if missing/invalid (NMEA 0183: $ or !)."""
         try:
@@ -457,15 +722,7 @@ class NMEAHandler:
                 return None
             if not (raw_line.startswith('$') or raw_line.startswith('!')):
                 return None
-            body, chk = raw_line[1:].split('*', 1)
-            chk = chk.strip()
-            if len(chk) < 2:
-                return None
-            expected = int(chk[:2], 16)
-            calc = 0
-            for b in body.encode('ascii', errors='ignore'):
-                calc ^= b
-            return calc == expected
+            return self._nmea_checksum_ok_bytes(raw_line.encode('ascii', errors='ignore'))
         except Exception:
             return None
 
@@ -520,23 +777,43 @@ class NMEAHandler:
             except Exception:
                 pass
 
-    def _emit_sensor_if_due(self):
-        now = time.time()
+    def _iso_timestamp(self, ts_ns):
+        """ISO-format a time.time_ns() stamp. Every sentence of a read shares one stamp,
+        so the last result is reused instead of formatting per sentence."""
+        last_ns, last_iso = self._last_iso
+        if ts_ns != last_ns:
+            last_iso = datetime.datetime.fromtimestamp(ts_ns / 1e9).isoformat()
+            self._last_iso = (ts_ns, last_iso)
+        return last_iso
+
+    def _format_history_message(self, message):
+        """History entries carry a raw time.time_ns() stamp; render the ISO timestamp clients expect."""
+        return {
+            "raw": message["raw"],
+            "type": message["type"],
+            "timestamp": self._iso_timestamp(message["ts_ns"])
+        }
+
+    def _emit_sensor_if_due(self, now=None):
+        if now is None:
+            now = time.time()
         # At most 5 Hz to avoid UI thrash
         if now - self._last_sensor_emit_ts >= 0.2:
             self._last_sensor_emit_ts = now
             self._sse_broadcast('sensor_data', self.sensor_data)
 
-    def _emit_status_if_due(self):
-        now = time.time()
+    def _emit_status_if_due(self, now=None):
+        if now is None:
+            now = time.time()
         # At most 1 Hz for status (counts/health)
         if now - self._last_status_emit_ts >= 1.0:
             self._last_status_emit_ts = now
             self._sse_broadcast('stream_status', {
                 'is_streaming': self.is_streaming,
-                'streaming_to': "host.docker.internal:27000" if self.is_streaming else None,
+                'streaming_to': STREAM_TARGET if self.is_streaming else None,
                 'autopilot_mode': self.state.get('autopilot_mode', self.DEFAULT_AUTOPILOT_MODE),
                 'streamed_messages': self.streamed_messages,
+                'dropped_messages': self.dropped_messages,
                 'messages_received': self.messages_received,
                 'serial_health': self.get_serial_health(),
                 'observed_sentence_last_seen': self.sentence_last_seen,
@@ -544,32 +821,65 @@ class NMEAHandler:
                 'connected_since': self.connected_since,
             })
 
+    def _log_stream_stats_if_due(self, now=None):
+        """Log one UDP throughput summary per STREAM_STATS_LOG_INTERVAL instead of per-sentence lines."""
+        if now is None:
+            now = time.time()
+        elapsed = now - self._last_stream_stats_log_ts
+        if elapsed < self.STREAM_STATS_LOG_INTERVAL:
+            return
+        self._last_stream_stats_log_ts = now
+        count, self._stream_count_bucket = self._stream_count_bucket, 0
+        if count:
+            self.app_logger.info("Streamed %d msgs in last %.0fs", count, elapsed)
+
+    def flush_nmea_log(self, now=None):
+        """Write buffered NMEA log lines to disk (before reading the log file, and periodically)."""
+        self._last_nmea_log_flush_ts = time.time() if now is None else now
+        self._nmea_log_buffer.flush()
+
+    def _flush_nmea_log_if_due(self, now=None):
+        if now is None:
+            now = time.time()
+        if now - self._last_nmea_log_flush_ts >= self.NMEA_LOG_FLUSH_INTERVAL:
+            self.flush_nmea_log(now)
+
     def _read_serial_loop(self):
-        """Background thread function for reading serial data. Processes messages as fast as
-        they arrive; only sleeps when read returns no data to avoid busy-loop on USB quirks."""
-        while not self.should_stop:
+        """Background thread function for reading serial data. Waits in select() until bytes
+        arrive, drains everything buffered in one read and processes each complete line."""
+        while not self._stop_evt.is_set():
             if self.serial_connection and self.serial_connection.is_open:
                 got_data = False
                 try:
                     with self._serial_health_lock:
                         self.serial_health['last_read_attempt_ts'] = time.time()
+                    if not self._wait_serial_readable(self.serial_connection, 0.5):
+                        with self._serial_health_lock:
+                            self.serial_health['read_timeouts'] += 1
+                        self._flush_nmea_log_if_due()  # Device quiet: don't leave lines buffered
+                        continue
                     with self._serial_lock:
-                        raw = self.serial_connection.readline().decode('utf-8', errors='ignore').strip()
-                        try:
-                            with self._serial_health_lock:
-                                self.serial_health['last_in_waiting'] = getattr(self.serial_connection, 'in_waiting', None)
-                        except Exception:
-                            pass
+                        # in_waiting is one FIONREAD ioctl; read() of that many bytes is a single
+                        # os.read with the GIL released, unlike readline()'s per-byte loop
+                        in_waiting = self.serial_connection.in_waiting
+                        chunk = self.serial_connection.read(in_waiting or 1)
+                    if chunk:
+                        self._err_backoff = self.READ_ERROR_BACKOFF_MIN
                     with self._serial_health_lock:
-                        self.serial_health['last_raw_len'] = len(raw) if raw else 0
-                        if not raw:
-                            self.serial_health['read_timeouts'] += 1
-                    for data in self._split_nmea_sentences(raw):
+                        self.serial_health['last_in_waiting'] = in_waiting
+                    self._rx_buf += chunk
+                    raw = self._take_complete_lines(self._rx_buf)
+                    with self._serial_health_lock:
+                        self.serial_health['last_raw_len'] = len(raw)
+                    # Sentences drained by one read arrived together: stamp them once
+                    now_ns = time.time_ns()
+                    now = now_ns / 1e9
+                    for sentence in self._split_nmea_sentences(raw):
                         got_data = True
-                        chk_ok = self._nmea_checksum_ok(data)
+                        chk_ok = self._nmea_checksum_ok_bytes(sentence)
                         with self._serial_health_lock:
                             if chk_ok is True:
-                                self.serial_health['last_good_nmea_ts'] = time.time()
+                                self.serial_health['last_good_nmea_ts'] = now
                             elif chk_ok is False:
                                 self.serial_health['checksum_mismatch'] += 1
                             else:
@@ -577,47 +887,50 @@ class NMEAHandler:
                         # Per 300WX manual: only accept sentences with valid checksum
                         if chk_ok is not True:
                             continue
+                        data = sentence.decode('utf-8', errors='ignore')
 
                         self.messages_received += 1
-                        # Parse NMEA message type (letters only; avoids HCHDG31.0 from truncated lines)
-                        raw_type = data.split(',')[0].lstrip('$!').strip()
-                        m = re.match(r'^[A-Z]+', raw_type) if raw_type else None
-                        addr = m.group(0) if m else (raw_type or '')
-                        msg_type = self._nmea_sentence_formatter(addr)
-                        self.nmea_messages.add(msg_type)
+                        # Message type from the raw address field (splitter guarantees a comma)
+                        msg_type = self._msg_type_for_address(sentence[:sentence.find(b',')])
                         # Track sentence last-seen for UI auto-sync
                         sentence_id = self._map_msg_to_sentence_id(data, msg_type)
                         if sentence_id:
-                            self.sentence_last_seen[sentence_id] = time.time()
+                            self.sentence_last_seen[sentence_id] = now
                         else:
                             with self._serial_health_lock:
                                 self.serial_health['unmapped_messages'] += 1
                                 self.serial_health['last_unmapped_type'] = msg_type
                         # Update aggregated sensor data
-                        self._parse_nmea_for_dashboard(data, msg_type)
+                        self._parse_nmea_for_dashboard(data, msg_type, now_ns)
                         
                         # Add message to history
                         message = {
                             "raw": data,
                             "type": msg_type,
-                            "timestamp": datetime.datetime.now().isoformat()
+                            "ts_ns": now_ns
                         }
-                        self.message_history.insert(0, message)  # Add to start of list
-                        if len(self.message_history) > self.max_history:
-                            self.message_history.pop()  # Remove oldest message
+                        self.message_history.appendleft(message)  # maxlen drops the oldest
+                        self._history_version += 1
                         
                         # Log the message
                         self.log_message(data)
-                        # Push to UI (near real-time)
-                        self._sse_broadcast('nmea_message', message)
-                        # Push derived aggregates/status (throttled)
-                        self._emit_sensor_if_due()
-                        self._emit_status_if_due()
+                        # Push to UI (near real-time); skip timestamp formatting when nobody listens
+                        if self._sse_clients:
+                            self._sse_broadcast('nmea_message', self._format_history_message(message))
+                        # Push derived aggregates/status (throttled); the read's stamp, no clock reads
+                        self._emit_sensor_if_due(now)
+                        self._emit_status_if_due(now)
+                        self._log_stream_stats_if_due(now)
+                        self._flush_nmea_log_if_due(now)
                         # Forward to autopilot via UDP based on selected mode.
-                        udp_sentences = self.AUTOPILOT_MODES.get(self.state.get('autopilot_mode'), set())
-                        if self.is_streaming and len(msg_type) >= 3 and msg_type[-3:] in udp_sentences:
-                            self.stream_message(data, msg_type)
+                        if self.is_streaming and msg_type[-3:] in self._udp_sentences:
+                            self._queue_stream(sentence)
+                    # One datagram per drained read: sentences that arrived together go out together
+                    if self._udp_batch:
+                        self._flush_stream()
                 except Exception as e:
+                    # Sentences queued before the error must not ride out with a later read
+                    self._clear_stream_batch()
                     err_str = str(e)
                     # Throttle "read but no data" to avoid log flood and possible I/O contention
                     if "returned no data" in err_str or "multiple access" in err_str:
@@ -640,20 +953,27 @@ class NMEAHandler:
                                 health.get('nodata_exceptions'),
                                 health.get('checksum_mismatch'),
                             )
-                        time.sleep(0.02)  # Brief sleep only on spurious read so we don't tight-loop
+                        self._stop_evt.wait(0.02)  # Brief pause only on spurious read so we don't tight-loop
                     else:
                         with self._serial_health_lock:
                             self.serial_health['other_read_exceptions'] += 1
-                        self.app_logger.error(f"Error in serial reader thread: {e}")
-                if not got_data and not self.should_stop:
-                    # No message this iteration (timeout or empty line); short sleep to avoid busy-wait
+                        # Log the first error of a streak, then back off until a read succeeds
+                        # so an unplugged device cannot spin the thread and flood the log
+                        if self._err_backoff == self.READ_ERROR_BACKOFF_MIN:
+                            self.app_logger.error(f"Error in serial reader thread: {e}")
+                        self._stop_evt.wait(self._err_backoff)
+                        self._err_backoff = min(self.READ_ERROR_BACKOFF_MAX, self._err_backoff * 2)
+                    self._flush_nmea_log_if_due()
+                if not got_data and not self._stop_evt.is_set():
+                    # Bytes arrived but no complete sentence yet; select() above does the waiting
                     with self._serial_health_lock:
                         self.serial_health['empty_reads'] += 1
-                    time.sleep(0.01)
             else:
-                time.sleep(0.2)  # Not connected; sleep before rechecking
+                self._flush_nmea_log_if_due()
+                self._stop_evt.wait(0.2)  # Not connected; wait before rechecking
+        self.flush_nmea_log()
 
-    def _parse_nmea_for_dashboard(self, raw_data, msg_type):
+    def _parse_nmea_for_dashboard(self, raw_data, msg_type, ts_ns=None):
         """
         Parse NMEA message and update aggregated sensor data for dashboard.
         """
@@ -661,7 +981,7 @@ class NMEAHandler:
             # Remove checksum if present
             data = raw_data.split('*')[0]
             fields = data.split(',')
-            timestamp = datetime.datetime.now().isoformat()
+            timestamp = self._iso_timestamp(time.time_ns() if ts_ns is None else ts_ns)
             
             # MWV / WIMWV - Wind Speed and Angle (Relative or True)
             if msg_type in ('MWV', 'WIMWV'):
@@ -945,17 +1265,18 @@ class NMEAHandler:
         """Start UDP streaming (idempotent: does not reset counter if already streaming)."""
         try:
             if not self.udp_socket:
-                self.udp_socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+                self.udp_socket = self._open_udp_socket()
             if not self.is_streaming:
-                self.streamed_messages = 0  # Reset counter only when actually starting
+                self.streamed_messages = 0  # Reset counters only when actually starting
+                self.dropped_messages = 0
             self.is_streaming = True
             self.state['is_streaming'] = True
             self.save_state()
             mode = self.state.get('autopilot_mode', self.DEFAULT_AUTOPILOT_MODE)
-            sentences = self.AUTOPILOT_MODES.get(mode, set())
+            sentences = self.AUTOPILOT_MODE_SENTENCES.get(mode, ())
             self.app_logger.info(
-                "UDP streaming to host.docker.internal:27000 — "
-                "mode=%s, sentences: %s", mode, ', '.join(sorted(sentences))
+                "UDP streaming to %s — "
+                "mode=%s, sentences: %s", STREAM_TARGET, mode, ', '.join(sentences)
             )
             return True, "Streaming started"
         except Exception as e:
@@ -965,10 +1286,11 @@ class NMEAHandler:
     def stop_streaming(self):
         """Stop UDP streaming"""
         try:
+            # Clear the flag before closing so the reader stops sending into the socket
+            self.is_streaming = False
             if self.udp_socket:
                 self.udp_socket.close()
                 self.udp_socket = None
-            self.is_streaming = False
             self.state['is_streaming'] = False
             self.save_state()
             self.app_logger.info("UDP streaming stopped")
@@ -977,25 +1299,84 @@ class NMEAHandler:
             self.app_logger.error(f"Error stopping UDP stream: {e}")
             return False, str(e)
 
-    def stream_message(self, message, msg_type):
-        """Stream NMEA message via UDP to autopilot"""
-        if self.is_streaming:
+    def set_autopilot_mode(self, mode):
+        """Select which sentence codes are forwarded to the autopilot (a key of AUTOPILOT_MODES)."""
+        self.state['autopilot_mode'] = mode
+        self._udp_sentences = self.AUTOPILOT_MODES[mode]
+        self.save_state()
+        self.app_logger.info("Autopilot UDP mode changed to '%s' — sentences: %s",
+                             mode, ', '.join(self.AUTOPILOT_MODE_SENTENCES[mode]))
+
+    def _open_udp_socket(self):
+        """Create the autopilot UDP socket: enlarged send buffer and non-blocking sends.
+        The destination is resolved once and the socket connected to it, so sends skip the
+        per-call hostname lookup; if that fails, sends fall back to sendto() by name."""
+        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, self.UDP_SNDBUF_BYTES)
+        sock.setblocking(False)
+        self.app_logger.debug(
+            f"UDP send buffer: requested {self.UDP_SNDBUF_BYTES}, "
+            f"got {sock.getsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF)}")
+        self._udp_connected = False
+        try:
+            dest = socket.getaddrinfo(self.UDP_TARGET_HOST, self.UDP_TARGET_PORT,
+                                      socket.AF_INET, socket.SOCK_DGRAM)[0][4]
+            sock.connect(dest)
+            self._udp_connected = True
+        except OSError as e:
+            self.app_logger.warning(
+                f"Could not resolve/connect UDP target {self.UDP_TARGET_HOST}:{self.UDP_TARGET_PORT}: {e}")
+        return sock
+
+    def _queue_stream(self, sentence):
+        """Queue one NMEA sentence (bytes as read from serial, without line ending) for the
+        autopilot. The caller has already checked is_streaming and the autopilot mode. The batch
+        is sent early if it reaches UDP_BATCH_MAX_SENTENCES or UDP_BATCH_MAX_BYTES; otherwise
+        the reader flushes it once the current read has been processed."""
+        # Extend the batch in place; no temporary sentence + b'\n' object per sentence
+        self._udp_batch += sentence
+        self._udp_batch += b'\n'
+        self._udp_batch_count += 1
+        if (self._udp_batch_count >= self.UDP_BATCH_MAX_SENTENCES
+                or len(self._udp_batch) >= self.UDP_BATCH_MAX_BYTES):
+            self._flush_stream()
+
+    def _clear_stream_batch(self):
+        """Discard sentences queued for the autopilot without sending them."""
+        self._udp_batch.clear()
+        self._udp_batch_count = 0
+
+    def _flush_stream(self):
+        """Send the queued sentences to the autopilot as a single UDP datagram. Only
+        start_streaming() opens the socket: if streaming was stopped after the sentences were
+        queued, or the socket is gone, the batch is discarded."""
+        count = self._udp_batch_count
+        sock = self.udp_socket
+        if not self.is_streaming or sock is None:
+            self._clear_stream_batch()
+            return
+        try:
+            if self._udp_connected:
+                sock.send(self._udp_batch)
+            else:
+                sock.sendto(self._udp_batch, (self.UDP_TARGET_HOST, self.UDP_TARGET_PORT))
+            self.streamed_messages += count
+            self._stream_count_bucket += count
+        except (BlockingIOError, ConnectionRefusedError):
+            # Send buffer full, or (connected socket) ICMP port-unreachable from a previous
+            # datagram because nothing is listening yet; drop rather than stall or reopen
+            self.dropped_messages += count
+        except Exception as e:
+            if not self.is_streaming:
+                return  # stop_streaming() closed the socket mid-send; nothing to recover
+            self.app_logger.error(f"Error streaming message: {e}")
             try:
-                if not self.udp_socket:
-                    self.udp_socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-                    self.app_logger.debug("Created new UDP socket")
-
-                encoded_message = (message + '\n').encode()
-                self.udp_socket.sendto(encoded_message, ('host.docker.internal', 27000))
-                self.streamed_messages += 1
-            except Exception as e:
-                self.app_logger.error(f"Error streaming message: {e}")
-                try:
-                    if self.udp_socket:
-                        self.udp_socket.close()
-                    self.udp_socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-                except Exception as socket_error:
-                    self.app_logger.error(f"Failed to recreate socket: {socket_error}")
+                sock.close()
+                self.udp_socket = self._open_udp_socket()
+            except Exception as socket_error:
+                self.app_logger.error(f"Failed to recreate socket: {socket_error}")
+        finally:
+            self._clear_stream_batch()
 
     # ── Cockpit data-lake WebSocket ──────────────────────────────────
 
@@ -1040,45 +1421,54 @@ class NMEAHandler:
         """Send a variable=value pair to all connected Cockpit clients."""
         if not self._ws_clients or self._ws_loop is None:
             return
-        msg = f"{variable}={value}"
+        # Hand the write to the WebSocket loop as a plain callback: broadcast() queues the frame
+        # on every open connection without awaiting, so no coroutine or Future is created per
+        # value and closed clients are skipped (the handler's finally removes them).
+        self._ws_loop.call_soon_threadsafe(
+            websockets.broadcast, self._ws_clients, f"{variable}={value}")
 
-        async def _send():
-            dead = set()
-            for client in self._ws_clients.copy():
-                try:
-                    await client.send(msg)
-                except Exception:
-                    dead.add(client)
-            self._ws_clients.difference_update(dead)
+    # ── Serial port discovery ─────────────────────────────────────
 
-        asyncio.run_coroutine_threadsafe(_send(), self._ws_loop)
+    # Seconds a get_ports() result is reused (the UI polls /api/serial/ports)
+    PORTS_CACHE_TTL = 2.0
 
-    # ── Serial port discovery ─────────────────────────────────────
+    # /dev name prefixes of candidate serial ports, in the order they are offered
+    _SERIAL_PORT_PREFIXES = ('ttyUSB', 'ttyACM', 'ttyAMA')
 
     def get_ports(self):
-        """Get list of available serial ports"""
+        """Get list of available serial ports (cached for PORTS_CACHE_TTL seconds)"""
+        cached_at, cached_ports = self._ports_cache
+        if time.monotonic() - cached_at < self.PORTS_CACHE_TTL:
+            return list(cached_ports)
+
+        # One directory listing instead of stat()ing each candidate node
         ports = []
-        # Check common USB serial ports
-        for i in range(4):  # Check ttyUSB0 through ttyUSB3
-            port = f'/dev/ttyUSB{i}'
-            if Path(port).exists():
-                ports.append(port)
-        
-        # Check common ACM ports
-        for i in range(2):  # Check ttyACM0 through ttyACM1
-            port = f'/dev/ttyAMA{i}'
-            if Path(port).exists():
-                ports.append(port)
-        
-        # Also check using pyserial's list_ports
         try:
-            for port in serial.tools.list_ports.comports():
-                if port.device not in ports:
-                    ports.append(port.device)
-        except Exception as e:
-            self.app_logger.error(f"Error listing ports: {e}")
+            with os.scandir('/dev') as entries:
+                ports = [e.name for e in entries if e.name.startswith(self._SERIAL_PORT_PREFIXES)]
+        except OSError as e:
+            self.app_logger.error(f"Error scanning /dev: {e}")
+
+        def _order(name):
+            prefix = next(p for p in self._SERIAL_PORT_PREFIXES if name.startswith(p))
+            suffix = name[len(prefix):]
+            return (self._SERIAL_PORT_PREFIXES.index(prefix),
+                    int(suffix) if suffix.isdigit() else 0, name)
+        ports = [f'/dev/{name}' for name in sorted(ports, key=_order)]
+
+        # Fall back to pyserial's sysfs scan only when /dev had no candidates
+        if not ports:
+            try:
+                ports = [port.device for port in serial.tools.list_ports.comports()]
+            except Exception as e:
+                self.app_logger.error(f"Error listing ports: {e}")
         
-        return ports
+        self._ports_cache = (time.monotonic(), ports)
+        return list(ports)
+
+    def _invalidate_ports_cache(self):
+        """Force the next get_ports() to rescan (connect/disconnect may coincide with replugging)."""
+        self._ports_cache = (float('-inf'), [])
 
     def get_device_ids(self):
         """Get mapping of /dev/serial/by-id/ names to their device paths with USB port info"""
@@ -1217,7 +1607,12 @@ class NMEAHandler:
         result = [None, None]
         def _open():
             try:
-                result[0] = serial.Serial(port=port, baudrate=baud_rate, timeout=1)
+                conn = serial.Serial(port=port, baudrate=baud_rate, timeout=1)
+                # Windows only: grow the driver RX queue so chunked reads never see overruns
+                # (Linux tty buffers are kernel-sized and pyserial has no setter there)
+                if hasattr(conn, 'set_buffer_size'):
+                    conn.set_buffer_size(rx_size=self.SERIAL_RX_BUFFER_SIZE)
+                result[0] = conn
             except Exception as e:
                 result[1] = e
         t = threading.Thread(target=_open, daemon=True)
@@ -1244,24 +1639,28 @@ class NMEAHandler:
             self.app_logger.debug(f"Trying {port} at {baud_rate} baud...")
             conn = self._safe_serial_open(port, baud_rate)
             conn.reset_input_buffer()
-            conn.write(self._nmea_cmd('PAMTX,1'))
+            conn.write(self._CMD_TX_ON)
             time.sleep(0.3)
 
             start_time = time.time()
             valid_count = 0
+            buf = bytearray()
             while time.time() - start_time < timeout:
                 try:
-                    data = conn.readline().decode('utf-8', errors='ignore').strip()
-                    if self._incoming_line_checksum_valid(data):
-                        valid_count += 1
-                        addr = data.split(',')[0].lstrip('$!').strip()
-                        msg_type = self._nmea_sentence_formatter(addr)
-                        self.app_logger.debug(f"NMEA at {baud_rate}: {msg_type} ({valid_count}/{min_messages})")
-                        if valid_count >= min_messages:
-                            return True, conn
+                    # Drain whatever is buffered; read(1) blocks up to the port timeout when idle
+                    buf += conn.read(conn.in_waiting or 1)
+                    for line in self._take_complete_lines(buf).splitlines():
+                        data = line.decode('utf-8', errors='ignore').strip()
+                        if self._incoming_line_checksum_valid(data):
+                            valid_count += 1
+                            addr = data[:data.find(',')].lstrip('$!').strip()
+                            msg_type = self._nmea_sentence_formatter(addr)
+                            self.app_logger.debug(f"NMEA at {baud_rate}: {msg_type} ({valid_count}/{min_messages})")
+                            if valid_count >= min_messages:
+                                return True, conn
                 except Exception as e:
                     self.app_logger.error(f"Error reading at {baud_rate} baud: {e}")
-                time.sleep(0.1)
+                    time.sleep(0.1)
 
             conn.close()
             return False, None
@@ -1287,12 +1686,12 @@ class NMEAHandler:
 
             # Step 1: $PAMTX,0 — suspend periodic sentences at 4800
             self.app_logger.debug("$PAMTX,0 — suspend transmission at 4800")
-            self.serial_connection.write(self._nmea_cmd('PAMTX,0'))
+            self.serial_connection.write(self._CMD_TX_OFF)
             time.sleep(0.3)
 
             # Step 2: $PAMTC,BAUD,<rate>*hh at 4800 — immediate switch on the wire
             self.app_logger.debug(f"$PAMTC,BAUD,{rate} at 4800")
-            self.serial_connection.write(self._nmea_cmd(f'PAMTC,BAUD,{rate}'))
+            self.serial_connection.write(self._CMD_BAUD_OPERATING)
             time.sleep(0.5)
 
             # Step 3: Drain any remaining bytes at 4800
@@ -1315,22 +1714,24 @@ class NMEAHandler:
 
             # Step 5: Resume periodic output
             self.app_logger.debug(f"$PAMTX,1 — resume transmission at {rate}")
-            self.serial_connection.write(self._nmea_cmd('PAMTX,1'))
+            self.serial_connection.write(self._CMD_TX_ON)
             time.sleep(0.3)
 
             # Step 6: Store default baud in NVM (does not change active rate; next cold boot uses this)
             self.app_logger.debug(f"$PAMTC,BAUD,{rate},CFG — save default baud to NVM")
-            self.serial_connection.write(self._nmea_cmd(f'PAMTC,BAUD,{rate},CFG'))
+            self.serial_connection.write(self._CMD_BAUD_OPERATING_CFG)
             time.sleep(0.3)
 
             # Step 7: Verify we're receiving valid NMEA at operating baud
             start_time = time.time()
+            buf = bytearray()
             while time.time() - start_time < 5:
-                data = self.serial_connection.readline().decode('utf-8', errors='ignore').strip()
-                if self._incoming_line_checksum_valid(data):
-                    self.app_logger.debug(f"Confirmed communication at {rate}")
-                    return True, f"Switched to {rate} baud (default saved with CFG)"
-                time.sleep(0.1)
+                buf += self.serial_connection.read(self.serial_connection.in_waiting or 1)
+                for line in self._take_complete_lines(buf).splitlines():
+                    data = line.decode('utf-8', errors='ignore').strip()
+                    if self._incoming_line_checksum_valid(data):
+                        self.app_logger.debug(f"Confirmed communication at {rate}")
+                        return True, f"Switched to {rate} baud (default saved with CFG)"
 
             return False, "No response after baud rate switch"
             
@@ -1354,19 +1755,16 @@ class NMEAHandler:
                 return False, "Not connected"
             
             # Ensure periodic sentences are on (device may have been stopped by a previous session)
-            self.serial_connection.write(self._nmea_cmd('PAMTX,1'))
+            self.serial_connection.write(self._CMD_TX_ON)
             time.sleep(0.3)
 
-            enabled_count = 0
-            for sentence_id in self.REQUIRED_SENTENCES:
-                config = self.SUPPORTED_SENTENCES.get(sentence_id, {})
-                interval = config.get('default_interval', 10)
-
-                cmd = self._nmea_cmd(f'PAMTC,EN,{sentence_id},1,{interval}')
-                self.app_logger.debug(f"Enabling sentence {sentence_id}")
-                self.serial_connection.write(cmd)
-                time.sleep(0.2)
-                enabled_count += 1
+            # All enable commands in one write; flush() returns once they are on the wire, so a
+            # single settle replaces the 200 ms pause per sentence
+            self.app_logger.debug(f"Enabling sentences {', '.join(self.REQUIRED_SENTENCES)}")
+            self.serial_connection.write(self._CMD_ENABLE_REQUIRED)
+            self.serial_connection.flush()
+            time.sleep(0.3)
+            enabled_count = len(self.REQUIRED_SENTENCES)
 
             self.app_logger.info(f"Enabled {enabled_count} required sentences")
             return True, f"Enabled {enabled_count} sentences"
@@ -1613,19 +2011,26 @@ class NMEAHandler:
                 config = {}
                 start_time = time.time()
                 timeout = 5  # 5 second timeout
+                buf = bytearray()
+                lines = []
                 
                 while time.time() - start_time < timeout:
-                    try:
-                        line = self.serial_connection.readline().decode('utf-8', errors='ignore').strip()
-                    except Exception as read_err:
-                        # USB serial often raises "returned no data" spuriously; retry
-                        if "returned no data" in str(read_err) or "multiple access" in str(read_err):
-                            time.sleep(0.05)
+                    if not lines:
+                        try:
+                            # Wake as soon as response bytes arrive instead of polling per line
+                            if not self._wait_serial_readable(self.serial_connection, 0.2):
+                                continue
+                            buf += self.serial_connection.read(self.serial_connection.in_waiting or 1)
+                        except Exception as read_err:
+                            # USB serial often raises "returned no data" spuriously; retry
+                            if "returned no data" in str(read_err) or "multiple access" in str(read_err):
+                                time.sleep(0.05)
+                                continue
+                            raise
+                        lines = self._take_complete_lines(buf).splitlines()
+                        if not lines:
                             continue
-                        raise
-                    if not line:
-                        time.sleep(0.05)
-                        continue
+                    line = lines.pop(0).decode('utf-8', errors='ignore').strip()
                     if line.startswith('$PAMTR,EN,'):
                         # Parse: $PAMTR,EN,<total>,<num>,<id>,<enabled>,<interval> or $PAMTR,EN,<id>,<enabled>,<interval>
                         parts = line.split(',')
@@ -1643,7 +2048,6 @@ class NMEAHandler:
                     
                     if len(config) >= len(self.SUPPORTED_SENTENCES):
                         break
-                    time.sleep(0.05)
             # #region agent log
             try:
                 _dbg_path = Path(__file__).resolve().parent.parent / '.cursor' / 'debug.log'
@@ -1736,6 +2140,7 @@ class NMEAHandler:
             max_attempts: Total attempts across all baud rates (default 6 = 3 per baud)
         """
         try:
+            self._invalidate_ports_cache()
             # Clean up any existing connection
             if self.serial_connection and self.serial_connection.is_open:
                 self.stop_reader_thread()
@@ -1877,11 +2282,14 @@ class NMEAHandler:
                 self.serial_connection.close()
             
             self.serial_connection = None
+            self._invalidate_ports_cache()
             
             # Reset state
             self.state['port'] = None
-            self.message_history = []  # Clear message history
+            self.message_history = deque(maxlen=self.max_history)  # Clear message history
+            self._history_version += 1
             self.nmea_messages = set()  # Clear detected message types
+            self._msg_type_cache = {}
             self.sentence_last_seen = {}
             self.connected_since = None
             self.messages_received = 0
@@ -1913,45 +2321,104 @@ class NMEAHandler:
             'port': self.serial_connection.port if is_connected else None,
             'baud_rate': self.serial_connection.baudrate if is_connected else 0,
             'detected_baud': self.detected_baud,
-            'required_sentences': list(self.REQUIRED_SENTENCES),
+            'required_sentences': self.REQUIRED_SENTENCES,  # tuple; serializes as a JSON array
             'stay_at_4800': bool(self.state.get('stay_at_4800', False)),
             'saved_port': self.state.get('port'),
             'saved_baud_rate': self.state.get('baud_rate', 4800),
             'device_info': self.device_info if is_connected else None,
+            'dropped_messages': self.dropped_messages,
         }
 
-    def read_serial(self):
-        """Read data from serial port - returns filtered message history"""
+    def get_formatted_history(self):
+        """Message history as client dicts (ISO timestamps), newest first. Rebuilt only when the
+        history changed; callers must treat the returned list as read-only."""
+        # Read the version before copying so a concurrent append can only make the cache newer
+        version = self._history_version
+        cached_version, formatted = self._history_list_cache
+        if cached_version != version:
+            formatted = [self._format_history_message(m) for m in list(self.message_history)]
+            self._history_list_cache = (version, formatted)
+        return formatted
+
+    def read_serial_json(self):
+        """Serialized /api/read body. The messages array is re-encoded only when the history
+        changed since the last call; the small dynamic fields are encoded per request."""
         if not self.serial_connection or not self.serial_connection.is_open:
-            return {"status": "error", "message": "Not connected"}
-        
-        return {
-            "status": "success",
-            "messages": self.message_history,
+            return _json_dumpb({"status": "error", "message": "Not connected"})
+
+        version = self._history_version
+        cached_version, messages_json = self._history_json_cache
+        if cached_version != version:
+            messages_json = _json_dumpb(self.get_formatted_history())
+            self._history_json_cache = (version, messages_json)
+
+        tail = _json_dumpb({
             "now": time.time(),
             "connected_since": self.connected_since,
-            "observed_sentence_last_seen": self.sentence_last_seen
-        }
+            "observed_sentence_last_seen": dict(self.sentence_last_seen)
+        })
+        return b'{"status":"success","messages":' + messages_json + b',' + tail[1:]
+
+    def stream_status_json(self):
+        """Serialized /api/stream/status body. The fields that only change through save_state()
+        are encoded once per state version; only the counters and health are encoded per call."""
+        version = self._state_version
+        cached_version, prefix = self._status_prefix_cache
+        if cached_version != version:
+            prefix = _json_dumpb({
+                "is_streaming": self.is_streaming,
+                "port": self.state['port'],
+                "baud_rate": self.state['baud_rate'],
+                "autopilot_mode": self.state.get('autopilot_mode', self.DEFAULT_AUTOPILOT_MODE),
+                "streaming_to": STREAM_TARGET if self.is_streaming else None,
+            })[:-1]
+            self._status_prefix_cache = (version, prefix)
+
+        tail = _json_dumpb({
+            "streamed_messages": self.streamed_messages,
+            "dropped_messages": self.dropped_messages,
+            "messages_received": self.messages_received,
+            "serial_health": self.get_serial_health(),
+        })
+        return prefix + b',' + tail[1:]
 
     def log_message(self, message):
         """Log NMEA message"""
         try:
-            # Ensure the log file exists
-            if not self.log_path.exists():
-                self.log_path.touch()
-            
-            # Write the message with timestamp
-            timestamp = datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-            with open(self.log_path, 'a') as f:
-                f.write(f"{timestamp} - {message}\n")
-            
-            # Also log to NMEA logger
+            # The nmea logger's FileHandler keeps the log file open; no per-message open/close
             self.nmea_logger.info(message)
             return True, "Message logged"
         except Exception as e:
             self.app_logger.error(f"Error logging NMEA message: {e}")
             return False, str(e)
 
+    def log_messages_bulk(self, messages):
+        """Append many NMEA sentences (str) to the log. The records go through the nmea logger's
+        level and filters, then out with the reader's buffered lines in one batched write.
+        Returns the number logged."""
+        logger = self.nmea_logger
+        if not logger.isEnabledFor(logging.INFO):
+            return 0
+        records = []
+        for message in messages:
+            message = message.strip()
+            if message:
+                record = logger.makeRecord(logger.name, logging.INFO, '', 0, message, None, None)
+                if logger.filter(record):
+                    records.append(record)
+        if records:
+            # Appended after the reader's queued lines, so the file stays in order
+            self._nmea_log_buffer.handle_batch(records)
+        return len(records)
+
+    def delete_nmea_log(self):
+        """Delete the NMEA log file. The handler is closed after the unlink so the next
+        message reopens (recreates) the file instead of writing to the deleted inode."""
+        self.flush_nmea_log()
+        if self.log_path.exists():
+            self.log_path.unlink()
+        self._nmea_fh.close()
+
     def change_baud_rate(self, new_baud_rate):
         """Change the baud rate of the weather station and save default to NVM (CFG)."""
         try:
@@ -1964,7 +2431,7 @@ class NMEAHandler:
 
             # Step 1: Disable periodic sentences
             self.app_logger.debug("Disabling periodic sentences")
-            self.serial_connection.write(self._nmea_cmd('PAMTX,0'))
+            self.serial_connection.write(self._CMD_TX_OFF)
             time.sleep(0.5)  # Wait for command to be processed
 
             # Step 2: Send baud rate change command
@@ -1984,7 +2451,7 @@ class NMEAHandler:
 
             # Step 5: Re-enable periodic sentences
             self.app_logger.debug("Re-enabling periodic sentences")
-            self.serial_connection.write(self._nmea_cmd('PAMTX,1'))
+            self.serial_connection.write(self._CMD_TX_ON)
             time.sleep(0.2)
 
             # Step 6: Persist as power-on default (300WX: $PAMTC,BAUD,<n>,CFG)
@@ -2000,14 +2467,56 @@ class NMEAHandler:
             self.app_logger.error(f"Error changing baud rate: {e}")
             return False, str(e)
 
+# Class-body comprehensions cannot see sibling class attributes, so build this one here
+NMEAHandler._CMD_ENABLE_REQUIRED = b''.join(
+    NMEAHandler._nmea_cmd(
+        f"PAMTC,EN,{sentence_id},1,"
+        f"{NMEAHandler.SUPPORTED_SENTENCES.get(sentence_id, {}).get('default_interval', 10)}")
+    for sentence_id in NMEAHandler.REQUIRED_SENTENCES)
+
 # Create NMEA handler instance
 nmea_handler = NMEAHandler()
 
+# Largest POST body decoded by _json_body(); the UI only sends small JSON objects
+MAX_JSON_BODY = 1 << 16
+
+def _json_body():
+    """Decode the request's JSON body with orjson (stdlib json if not installed). Returns None for
+    an empty, oversized, malformed or non-object body, which routes treat like a missing field."""
+    if not request.content_length or request.content_length > MAX_JSON_BODY:
+        return None
+    raw = request.get_data(cache=False)
+    try:
+        obj = orjson.loads(raw) if HAS_ORJSON else json.loads(raw)
+    except ValueError:
+        return None
+    # Every route expects an object; arrays/strings/numbers read as a missing body
+    return obj if isinstance(obj, dict) else None
+
+def _json_bytes(body, status=200):
+    """Response for an already-serialized JSON body (bytes or str). direct_passthrough hands the
+    body to the WSGI server as-is instead of re-iterating it through Werkzeug's encoder."""
+    return Response(body, status=status, mimetype='application/json', direct_passthrough=True)
+
+def _result_response(success, message):
+    """The {"success": ..., "message": ...} reply most actions return. Only the message needs
+    JSON escaping; the rest is fixed bytes."""
+    return _json_bytes(b'{"success":' + (b'true' if success else b'false')
+                       + b',"message":' + _json_dumpb(message) + b'}')
+
+# Constant validation errors, encoded once. Each request still gets its own Response
+# object because after_request hooks (flask-cors) add headers to it.
+_ERR_NO_PORT = b'{"success":false,"message":"No port specified"}'
+_ERR_NO_SENTENCE_ID = b'{"success":false,"message":"No sentence_id specified"}'
+_ERR_NO_CHANGES = b'{"success":false,"message":"No changes provided"}'
+_ERR_NO_MESSAGE = b'{"success":false,"message":"No message specified"}'
+_ERR_NO_BAUD = b'{"success":false,"message":"No baud rate specified"}'
+
 def _sse_encode(event_name, data_obj):
-    payload = json.dumps(data_obj, separators=(',', ':'))
+    payload = _json_dumps(data_obj)
     return f"event: {event_name}\ndata: {payload}\n\n"
 
-@app.route('/api/events', methods=['GET'])
+@app.get('/api/events')
 def sse_events():
     """Server-Sent Events stream for near real-time UI updates."""
     q = nmea_handler.sse_add_client()
@@ -2019,9 +2528,10 @@ def sse_events():
                 'connection': nmea_handler.get_connection_info(),
                 'stream_status': {
                     'is_streaming': nmea_handler.is_streaming,
-                    'streaming_to': "host.docker.internal:27000" if nmea_handler.is_streaming else None,
+                    'streaming_to': STREAM_TARGET if nmea_handler.is_streaming else None,
                     'autopilot_mode': nmea_handler.state.get('autopilot_mode', nmea_handler.DEFAULT_AUTOPILOT_MODE),
                     'streamed_messages': nmea_handler.streamed_messages,
+                    'dropped_messages': nmea_handler.dropped_messages,
                     'messages_received': nmea_handler.messages_received,
                     'serial_health': nmea_handler.get_serial_health(),
                     'observed_sentence_last_seen': nmea_handler.sentence_last_seen,
@@ -2029,7 +2539,7 @@ def sse_events():
                     'connected_since': nmea_handler.connected_since,
                 },
                 'sensor_data': nmea_handler.sensor_data,
-                'messages': nmea_handler.message_history[:50],
+                'messages': nmea_handler.get_formatted_history()[:50],
             }
             yield _sse_encode('init', init)
 
@@ -2061,64 +2571,69 @@ def widget_page():
     """Narrow wind + navigation widget (embeddable)"""
     return send_from_directory(app.static_folder, 'widget.html')
 
+# Payloads of /register_service and /docs never change: encode them once at import
+_REGISTER_SERVICE_BODY = _json_dumpb({
+    "name": "Airmar 300WX",
+    "description": "Airmar 300WX WeatherStation interface for BlueOS",
+    "icon": "mdi-weather-windy",
+    "company": "Blue Robotics",
+    "version": "0.1.0",
+    "webpage": "https://github.com/vshie/Airmar-WX",
+    "api": "https://github.com/vshie/Airmar-WX"
+})
+
+_DOCS_BODY = _json_dumpb({
+    "openapi": "3.0.0",
+    "info": {
+        "title": "Airmar 300WX API",
+        "version": "0.1",
+        "description": "API for Airmar 300WX WeatherStation"
+    },
+    "paths": {
+        "/api/serial/ports": {
+            "get": {
+                "summary": "Get available serial ports",
+                "responses": {
+                    "200": {
+                        "description": "List of available ports"
+                    }
+                }
+            }
+        }
+    }
+})
+
 @app.route('/register_service')
 def register_service():
     """Provide extension metadata to BlueOS"""
-    return jsonify({
-        "name": "Airmar 300WX",
-        "description": "Airmar 300WX WeatherStation interface for BlueOS",
-        "icon": "mdi-weather-windy",
-        "company": "Blue Robotics",
-        "version": "0.1.0",
-        "webpage": "https://github.com/vshie/Airmar-WX",
-        "api": "https://github.com/vshie/Airmar-WX"
-    })
+    return _json_bytes(_REGISTER_SERVICE_BODY)
 
 @app.route('/docs')
 def docs():
     """Serve API documentation"""
-    return jsonify({
-        "openapi": "3.0.0",
-        "info": {
-            "title": "Airmar 300WX API",
-            "version": "0.1",
-            "description": "API for Airmar 300WX WeatherStation"
-        },
-        "paths": {
-            "/api/serial/ports": {
-                "get": {
-                    "summary": "Get available serial ports",
-                    "responses": {
-                        "200": {
-                            "description": "List of available ports"
-                        }
-                    }
-                }
-            }
-        }
-    })
+    return _json_bytes(_DOCS_BODY)
 
 @app.route('/v1.0/ui/')
 def ui():
     """Serve the UI"""
     return send_from_directory(app.static_folder, 'index.html')
 
-@app.route('/api/serial/ports', methods=['GET'])
+@app.get('/api/serial/ports')
 def get_ports():
     """Get list of available serial ports"""
     return jsonify({"ports": nmea_handler.get_ports()})
 
-@app.route('/api/serial/device-ids', methods=['GET'])
+@app.get('/api/serial/device-ids')
 def get_device_ids():
     """Get device ID mappings from /dev/serial/by-id/"""
     return jsonify({"devices": nmea_handler.get_device_ids()})
 
-@app.route('/api/serial/select', methods=['POST'])
+@app.post('/api/serial/select')
 def select_port():
     """Select and connect to a serial port"""
-    data = request.get_json()
+    data = _json_body()
     if not data or 'port' not in data:
-        return jsonify({"success": False, "message": "No port specified"})
+        return _json_bytes(_ERR_NO_PORT)
     
     # Use saved baud as a hint for which rate to try first (e.g. 115200 if already switched)
     if data['port'] == nmea_handler.state.get('port'):
@@ -2127,9 +2642,9 @@ def select_port():
         baud_rate = 4800
     stay_at_4800 = bool(data.get('stay_at_4800', False))
     success, message = nmea_handler.connect_serial(data['port'], baud_rate, stay_at_4800=stay_at_4800)
-    return jsonify({"success": success, "message": message})
+    return _result_response(success, message)
 
-@app.route('/api/serial/cancel', methods=['POST'])
+@app.post('/api/serial/cancel')
 def cancel_connect():
     """Cancel any in-progress connection attempt"""
     nmea_handler._cancel_connect = True
@@ -2137,13 +2652,13 @@ def cancel_connect():
         nmea_handler.CONN_STATUS_DISCONNECTED, 'Cancelling...')
     return jsonify({"success": True})
 
-@app.route('/api/serial/disconnect', methods=['POST'])
+@app.post('/api/serial/disconnect')
 def disconnect_port():
     """Disconnect from serial port"""
     success, message = nmea_handler.disconnect_serial()
-    return jsonify({"success": success, "message": message})
+    return _result_response(success, message)
 
-@app.route('/api/serial', methods=['GET'])
+@app.get('/api/serial')
 def get_serial_info():
     """Get current serial port information"""
     if nmea_handler.serial_connection and nmea_handler.serial_connection.is_open:
@@ -2154,26 +2669,26 @@ def get_serial_info():
         })
     return jsonify({"serial_port": "Not connected", "baud_rate": 0, "detected_baud": None})
 
-@app.route('/api/connection/status', methods=['GET'])
+@app.get('/api/connection/status')
 def get_connection_status():
     """Get detailed connection status information"""
     return jsonify(nmea_handler.get_connection_info())
 
-@app.route('/api/sensor/state', methods=['GET'])
+@app.get('/api/sensor/state')
 def get_sensor_state():
     """Get aggregated sensor data for dashboard display"""
     return jsonify(nmea_handler.get_sensor_data())
 
-@app.route('/api/sensor/history', methods=['GET'])
+@app.get('/api/sensor/history')
 def get_sensor_history():
     """Get historical sensor data for sparklines (15 min)"""
     return jsonify(nmea_handler.get_sensor_history())
 
 
-@app.route('/api/sensor/history/reset-wind-paired', methods=['POST'])
+@app.post('/api/sensor/history/reset-wind-paired')
 def reset_wind_paired_history():
     """Clear apparent or true paired wind history (roses and heatmaps for that stream)."""
-    data = request.get_json() or {}
+    data = _json_body() or {}
     which = data.get('which', '')
     if which not in ('apparent', 'true'):
         return jsonify({'error': 'which must be "apparent" or "true"'}), 400
@@ -2182,7 +2697,7 @@ def reset_wind_paired_history():
 
 # ============== Sentence Configuration API ==============
 
-@app.route('/api/sentences', methods=['GET'])
+@app.get('/api/sentences')
 def get_sentences():
     """Get list of all supported NMEA sentences with their info and saved config (persisted across restarts)."""
     return jsonify({
@@ -2191,13 +2706,13 @@ def get_sentences():
         "saved_config": nmea_handler.state.get('sentence_config') or {}
     })
 
-@app.route('/api/sentences/configure', methods=['POST'])
+@app.post('/api/sentences/configure')
 def configure_sentence():
     """Configure a single NMEA sentence (enable/disable, set interval).
     interval: seconds (0.1–5), converted to device tenths-of-seconds internally."""
-    data = request.get_json()
+    data = _json_body()
     if not data or 'sentence_id' not in data:
-        return jsonify({"success": False, "message": "No sentence_id specified"})
+        return _json_bytes(_ERR_NO_SENTENCE_ID)
     
     sentence_id = data['sentence_id']
     enabled = data.get('enabled', True)
@@ -2213,16 +2728,16 @@ def configure_sentence():
             pass
     
     success, message = nmea_handler.configure_sentence(sentence_id, enabled, interval)
-    return jsonify({"success": success, "message": message})
+    return _result_response(success, message)
 
-@app.route('/api/sentences/configure-batch', methods=['POST'])
+@app.post('/api/sentences/configure-batch')
 def configure_sentences_batch():
     """Configure multiple NMEA sentences in one call.
     Body: { changes: [{sentence_id, enabled, interval(seconds 0.1–5)}] }"""
-    data = request.get_json() or {}
+    data = _json_body() or {}
     changes_in = data.get('changes', [])
     if not isinstance(changes_in, list) or not changes_in:
-        return jsonify({"success": False, "message": "No changes provided"})
+        return _json_bytes(_ERR_NO_CHANGES)
     # Convert interval seconds -> tenths for device
     changes = []
     for ch in changes_in:
@@ -2241,78 +2756,123 @@ def configure_sentences_batch():
                 interval = None
         changes.append({"sentence_id": sentence_id, "enabled": enabled, "interval": interval})
     success, message = nmea_handler.configure_sentences_batch(changes)
-    return jsonify({"success": success, "message": message})
+    return _result_response(success, message)
 
-@app.route('/api/sentences/query', methods=['POST'])
+@app.post('/api/sentences/query')
 def query_sentences():
     """Query the device for current sentence configuration"""
     success, result = nmea_handler.query_sentence_config()
     if success:
         return jsonify({"success": True, "config": result})
     else:
-        return jsonify({"success": False, "message": result})
+        return _result_response(False, result)
 
-@app.route('/api/sentences/save', methods=['POST'])
+@app.post('/api/sentences/save')
 def save_sentences():
     """Save current sentence configuration to device EEPROM"""
     success, message = nmea_handler.save_sentence_config()
-    return jsonify({"success": success, "message": message})
+    return _result_response(success, message)
 
-@app.route('/api/sentences/load-defaults', methods=['POST'])
+@app.post('/api/sentences/load-defaults')
 def load_sentence_defaults():
     """Load factory default sentence configuration"""
     success, message = nmea_handler.load_sentence_defaults()
-    return jsonify({"success": success, "message": message})
+    return _result_response(success, message)
 
 # ============== End Sentence Configuration API ==============
 
-@app.route('/api/read', methods=['GET'])
+@app.get('/api/read')
 def read_serial():
     """Read data from serial port"""
-    return jsonify(nmea_handler.read_serial())
+    return _json_bytes(nmea_handler.read_serial_json())
 
-@app.route('/api/log_message', methods=['POST'])
+@app.post('/api/log_message')
 def log_message():
     """Log NMEA message"""
-    data = request.get_json()
+    data = _json_body()
     if not data or 'message' not in data:
-        return jsonify({"success": False, "message": "No message specified"})
+        return _json_bytes(_ERR_NO_MESSAGE)
     
     success, message = nmea_handler.log_message(data['message'])
-    return jsonify({"success": success, "message": message})
-
-@app.route('/api/logs', methods=['GET'])
+    return _result_response(success, message)
+
+# Largest body accepted by /api/log/batch (matches the app-wide MAX_CONTENT_LENGTH)
+MAX_LOG_BATCH_BODY = 1 << 20
+
+@app.post('/api/log/batch')
+def log_message_batch():
+    """Log many NMEA messages in one request. Body: one message per line, either raw
+    sentences or NDJSON objects of the form {"message": ...}"""
+    # Chunked uploads have no Content-Length and would be read unbounded: require one
+    if request.content_length is None:
+        return _result_response(False, "Content-Length required"), 411
+    if request.content_length > MAX_LOG_BATCH_BODY:
+        return _result_response(False, "Batch too large"), 413
+    messages = []
+    for line in request.get_data(cache=False).split(b'\n'):
+        line = line.strip()
+        if not line:
+            continue
+        if line[:1] == b'{':
+            try:
+                obj = orjson.loads(line) if HAS_ORJSON else json.loads(line)
+            except ValueError:
+                continue
+            message = obj.get('message') if isinstance(obj, dict) else None
+            if isinstance(message, str):
+                messages.append(message)
+        else:
+            messages.append(line.decode('utf-8', errors='replace'))
+    if not messages:
+        return _json_bytes(_ERR_NO_MESSAGE)
+    try:
+        count = nmea_handler.log_messages_bulk(messages)
+    except Exception as e:
+        nmea_handler.app_logger.error(f"Error logging NMEA batch: {e}")
+        return _result_response(False, str(e))
+    return jsonify({"success": True, "message": f"Logged {count} messages", "count": count})
+
+def _send_log_file(path):
+    """Send a log as an attachment. The file is streamed through the server's file wrapper
+    (never read into memory); Range and If-Modified-Since / If-None-Match requests are answered
+    with 206 / 304, and max_age=0 makes clients revalidate since logs keep growing."""
+    return send_file(path, as_attachment=True, conditional=True, etag=True,
+                     last_modified=path.stat().st_mtime, max_age=0)
+
+@app.get('/api/logs')
 def download_logs():
     """Download log file"""
+    nmea_handler.flush_nmea_log()
     if not nmea_handler.log_path.exists():
         return jsonify({
             "success": False,
             "message": "No log file found. Connect to a device and receive messages to create logs."
         }), 404
-    return send_file(nmea_handler.log_path, as_attachment=True)
+    return _send_log_file(nmea_handler.log_path)
 
-@app.route('/api/logs/delete', methods=['POST'])
+@app.post('/api/logs/delete')
 def delete_logs():
     """Delete log file"""
     try:
-        if nmea_handler.log_path.exists():
-            nmea_handler.log_path.unlink()
-        return jsonify({"success": True, "message": "Logs deleted successfully"})
+        nmea_handler.delete_nmea_log()
+        _line_count_cache.pop(str(nmea_handler.log_path), None)
+        return _result_response(True, "Logs deleted successfully")
     except Exception as e:
-        return jsonify({"success": False, "message": str(e)})
+        return _result_response(False, str(e))
 
-@app.route('/api/logs/app/delete', methods=['POST'])
+@app.post('/api/logs/app/delete')
 def delete_app_logs():
     """Delete application log file"""
     try:
         app_log_path = Path('/app/logs/300wx.log')
         if app_log_path.exists():
             app_log_path.unlink()
-        return jsonify({"success": True, "message": "Application log deleted successfully"})
+        _line_count_cache.pop(str(app_log_path), None)
+        return _result_response(True, "Application log deleted successfully")
     except Exception as e:
-        return jsonify({"success": False, "message": str(e)})
+        return _result_response(False, str(e))
 
-@app.route('/api/logs/app', methods=['GET'])
+@app.get('/api/logs/app')
 def download_app_logs():
     """Download application log file"""
     app_log_path = Path('/app/logs/300wx.log')
@@ -2321,13 +2881,14 @@ def download_app_logs():
             "success": False,
             "message": "No application log file found."
         }), 404
-    return send_file(app_log_path, as_attachment=True)
+    return _send_log_file(app_log_path)
 
-@app.route('/api/logs/info', methods=['GET'])
+@app.get('/api/logs/info')
 def get_logs_info():
     """Get information about log files"""
     log_dir = Path('/app/logs')
     logs = []
+    nmea_handler.flush_nmea_log()
     
     for log_file in [nmea_handler.log_path, log_dir / '300wx.log']:
         if log_file.exists():
@@ -2355,33 +2916,106 @@ def get_logs_info():
         'logs': logs
     })
 
-@app.route('/api/logs/preview', methods=['GET'])
+# Upper bound on lines returned by /api/logs/preview and /api/logs/tail
+MAX_TAIL_LINES = 5000
+_TAIL_BLOCK_SIZE = 8192
+
+def _tail_lines(path, n):
+    """Last n lines of a file (bytes, line endings stripped). Reads backwards from the end in
+    blocks until n complete lines are buffered, so cost follows n, not the file size."""
+    if n <= 0:
+        return []
+    blocks = []
+    newlines = 0
+    with open(path, 'rb') as f:
+        pos = f.seek(0, os.SEEK_END)
+        # n + 1 newlines guarantee the first of the last n lines is complete
+        while pos > 0 and newlines <= n:
+            step = min(_TAIL_BLOCK_SIZE, pos)
+            pos -= step
+            f.seek(pos)
+            block = f.read(step)
+            newlines += block.count(b'\n')
+            blocks.append(block)
+    blocks.reverse()
+    return b''.join(blocks).splitlines()[-n:]
+
+# { path: (st_ino, bytes counted, newlines in them) }, see _count_lines
+_line_count_cache = {}
+
+def _count_lines(path):
+    """Number of lines in a file. The first call scans the whole file; later calls only count
+    the bytes appended since (logs only grow), and rescan if the file was replaced or truncated.
+    The delete routes drop the cached count, so a recreated log is always rescanned."""
+    st = path.stat()
+    key = str(path)
+    ino, counted, newlines = _line_count_cache.get(key, (None, 0, 0))
+    if ino != st.st_ino or st.st_size < counted:
+        counted, newlines = 0, 0
+    last = b''
+    with open(path, 'rb') as f:
+        f.seek(counted)
+        for block in iter(lambda: f.read(1 << 16), b''):
+            newlines += block.count(b'\n')
+            counted += len(block)
+            last = block[-1:]
+        if not last and counted:
+            f.seek(counted - 1)
+            last = f.read(1)
+    _line_count_cache[key] = (st.st_ino, counted, newlines)
+    # A final line without a trailing newline still counts
+    return newlines + (1 if last and last != b'\n' else 0)
+
+def _tail_line_count(default):
+    """Parse ?lines= for the log preview/tail routes, clamped to 1..MAX_TAIL_LINES.
+    Returns None if the value is not an integer."""
+    try:
+        lines = int(request.args.get('lines', default))
+    except ValueError:
+        return None
+    return max(1, min(lines, MAX_TAIL_LINES))
+
+def _log_path_for(log_type):
+    """Resolve the ?type= query value ('nmea' or 'app') to a log path; NMEA is flushed first."""
+    if log_type == 'nmea':
+        nmea_handler.flush_nmea_log()
+        return nmea_handler.log_path
+    return Path('/app/logs/300wx.log')
+
+@app.get('/api/logs/preview')
 def get_log_preview():
     """Get the last N lines of a log file"""
     log_type = request.args.get('type', 'nmea')  # 'nmea' or 'app'
-    lines = int(request.args.get('lines', 50))
-    
-    if log_type == 'nmea':
-        log_path = nmea_handler.log_path
-    else:
-        log_path = Path('/app/logs/300wx.log')
+    lines = _tail_line_count(50)
+    if lines is None:
+        return _result_response(False, "lines must be an integer"), 400
+    log_path = _log_path_for(log_type)
     
     if not log_path.exists():
         return jsonify({'lines': [], 'total_lines': 0})
     
     try:
-        with open(log_path, 'r') as f:
-            all_lines = f.readlines()
-            total = len(all_lines)
-            preview_lines = all_lines[-lines:] if total > lines else all_lines
-            return jsonify({
-                'lines': [line.rstrip() for line in preview_lines],
-                'total_lines': total,
-                'showing': len(preview_lines)
-            })
+        preview_lines = _tail_lines(log_path, lines)
+        return jsonify({
+            'lines': [line.decode('utf-8', errors='replace').rstrip() for line in preview_lines],
+            'total_lines': _count_lines(log_path),
+            'showing': len(preview_lines)
+        })
     except Exception as e:
         return jsonify({'error': str(e), 'lines': [], 'total_lines': 0})
 
+@app.get('/api/logs/tail')
+def get_log_tail():
+    """Last N lines of a log file as plain text (?lines=N, ?type=nmea|app)"""
+    lines = _tail_line_count(100)
+    if lines is None:
+        return _result_response(False, "lines must be an integer"), 400
+    log_path = _log_path_for(request.args.get('type', 'nmea'))
+    if not log_path.exists():
+        return Response(b'', mimetype='text/plain')
+    tail = _tail_lines(log_path, lines)
+    return Response(b'\n'.join(tail) + b'\n' if tail else b'', mimetype='text/plain')
+
 def _format_size(size_bytes):
     """Format bytes to human readable size"""
     for unit in ['B', 'KB', 'MB', 'GB']:
@@ -2405,65 +3039,91 @@ def _format_time_ago(timestamp):
     else:
         return "Just now"
 
-@app.route('/api/stream/start', methods=['POST'])
+@app.post('/api/stream/start')
 def start_streaming():
     """Start UDP streaming"""
     success, message = nmea_handler.start_streaming()
-    return jsonify({"success": success, "message": message})
+    return _result_response(success, message)
 
-@app.route('/api/stream/stop', methods=['POST'])
+@app.post('/api/stream/stop')
 def stop_streaming():
     """Stop UDP streaming"""
     success, message = nmea_handler.stop_streaming()
-    return jsonify({"success": success, "message": message})
+    return _result_response(success, message)
+
+# Polled status body: reused for STATUS_CACHE_TTL seconds unless save_state() ran in between
+STATUS_CACHE_TTL = 0.25
+_status_cache = {'ts': float('-inf'), 'version': -1, 'entry': (b'', '')}  # entry: (body, etag)
 
-@app.route('/api/stream/status', methods=['GET'])
+@app.get('/api/stream/status')
 def get_streaming_status():
     """Get current streaming status"""
-    mode = nmea_handler.state.get('autopilot_mode', nmea_handler.DEFAULT_AUTOPILOT_MODE)
-    return jsonify({
-        "is_streaming": nmea_handler.is_streaming,
-        "port": nmea_handler.state['port'],
-        "baud_rate": nmea_handler.state['baud_rate'],
-        "autopilot_mode": mode,
-        "streaming_to": "host.docker.internal:27000" if nmea_handler.is_streaming else None,
-        "streamed_messages": nmea_handler.streamed_messages,
-        "messages_received": nmea_handler.messages_received,
-        "serial_health": nmea_handler.get_serial_health(),
-    })
+    now = time.monotonic()
+    version = nmea_handler._state_version
+    if now - _status_cache['ts'] >= STATUS_CACHE_TTL or _status_cache['version'] != version:
+        body = nmea_handler.stream_status_json()
+        # Content hash: the body also carries counters and health timestamps, not just state
+        _status_cache['entry'] = (body, f"{zlib.crc32(body):08x}-{len(body)}")
+        _status_cache['version'] = version
+        _status_cache['ts'] = now
+    body, etag = _status_cache['entry']
+    if request.if_none_match.contains_weak(etag):
+        resp = Response(status=304)
+    else:
+        resp = _json_bytes(body)
+    resp.set_etag(etag, weak=True)
+    return resp
 
-@app.route('/api/stream/autopilot_mode', methods=['POST'])
+_ERR_BAD_MODE = _json_dumpb({
+    "success": False,
+    "message": f"Invalid mode. Choose from: {list(NMEAHandler.AUTOPILOT_MODES)}",
+})
+
+@app.post('/api/stream/autopilot_mode')
 def set_autopilot_mode():
     """Set which data to stream to the autopilot (windvane or gps)"""
-    data = request.get_json()
+    data = _json_body()
     mode = data.get('mode') if data else None
-    if mode not in nmea_handler.AUTOPILOT_MODES:
-        return jsonify({"success": False, "message": f"Invalid mode. Choose from: {list(nmea_handler.AUTOPILOT_MODES.keys())}"})
-    nmea_handler.state['autopilot_mode'] = mode
-    nmea_handler.save_state()
-    sentences = nmea_handler.AUTOPILOT_MODES[mode]
-    nmea_handler.app_logger.info("Autopilot UDP mode changed to '%s' — sentences: %s", mode, ', '.join(sorted(sentences)))
-    return jsonify({"success": True, "mode": mode, "sentences": sorted(sentences)})
-
-@app.route('/api/serial/change_baud', methods=['POST'])
+    if not isinstance(mode, str) or mode not in nmea_handler.AUTOPILOT_MODES:
+        return _json_bytes(_ERR_BAD_MODE)
+    nmea_handler.set_autopilot_mode(mode)
+    return jsonify({"success": True, "mode": mode, "sentences": nmea_handler.AUTOPILOT_MODE_SENTENCES[mode]})
+
+# Baud rates accepted by /api/serial/change_baud: factory default and operating rate
+_ALLOWED_BAUDS = frozenset({4800, NMEAHandler.OPERATING_BAUD_RATE})
+_ERR_BAD_BAUD = _json_dumpb({
+    "success": False,
+    "message": f"Invalid baud rate. Must be one of: {sorted(_ALLOWED_BAUDS)}",
+})
+
+@app.post('/api/serial/change_baud')
 def change_baud():
     """Change the baud rate of the weather station"""
-    data = request.get_json()
+    data = _json_body()
     if not data or 'baud_rate' not in data:
-        return jsonify({"success": False, "message": "No baud rate specified"})
+        return _json_bytes(_ERR_NO_BAUD)
     
     baud_rate = data['baud_rate']
-    allowed = [4800, nmea_handler.OPERATING_BAUD_RATE]
-    if baud_rate not in allowed:
-        return jsonify({
-            "success": False,
-            "message": f"Invalid baud rate. Must be one of: {allowed}",
-        })
+    # isinstance first: an unhashable JSON value (list/object) can't be looked up in the set
+    if not isinstance(baud_rate, int) or baud_rate not in _ALLOWED_BAUDS:
+        return _json_bytes(_ERR_BAD_BAUD)
     
     success, message = nmea_handler.change_baud_rate(baud_rate)
-    return jsonify({"success": success, "message": message})
+    return _result_response(success, message)
 
 if __name__ == '__main__':
+    import signal
+    import sys
     from waitress import serve
+    # docker stop sends SIGTERM, which by default kills the process without running atexit
+    # hooks; exit normally instead so the buffered NMEA log lines are flushed.
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+    # Stays on waitress: /api/events holds its request open for the life of each SSE client,
+    # which needs a thread per stream. Single-threaded C servers (bjoern, fastwsgi, meinheld)
+    # would stall every other route behind the first open stream.
     # SSE clients hold a worker thread each; >4 default threads avoids queue backlog.
-    serve(app, host='0.0.0.0', port=6436, threads=16)
+    # Polling clients reuse keep-alive connections: allow more of them than the default 100,
+    # close idle ones after 120 s (SSE keepalives every 15 s keep streams open) and
+    # dispatch sockets with poll() instead of select().
+    serve(app, host='0.0.0.0', port=6436, threads=16, connection_limit=1024,
+          channel_timeout=120, asyncore_use_poll=True)